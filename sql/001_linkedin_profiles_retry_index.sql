@@ -0,0 +1,7 @@
+-- Partial index backing the retry branch of fetch_guests_pending_for_enrichment().
+-- Only failed rows that can still be retried are indexed, in the order the query
+-- consumes them, so the branch is an index range scan instead of a seq scan + sort.
+-- The never-enriched branch uses the (luma_guest_api_id, linkedin_handle) unique index.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_linkedin_profiles_retry_eligible
+    ON luma.linkedin_profiles (retry_count, last_retry_at NULLS FIRST)
+    WHERE profile_found = FALSE AND retry_count < 3;
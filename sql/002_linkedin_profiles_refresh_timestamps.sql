@@ -0,0 +1,23 @@
+-- Maintain last_refreshed_at/_updated_at in the database instead of in every
+-- upsert statement: defaults cover inserts, a trigger covers updates (including
+-- INSERT ... ON CONFLICT DO UPDATE). now() is the transaction timestamp, so a
+-- whole batch gets one consistent value.
+-- Apply before deploying code that no longer sets these columns on upsert.
+ALTER TABLE luma.linkedin_profiles
+    ALTER COLUMN last_refreshed_at SET DEFAULT (extract(epoch FROM now()) * 1000)::BIGINT,
+    ALTER COLUMN _updated_at SET DEFAULT (extract(epoch FROM now()) * 1000)::BIGINT;
+
+CREATE OR REPLACE FUNCTION luma.set_linkedin_profiles_refreshed_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.last_refreshed_at := (extract(epoch FROM now()) * 1000)::BIGINT;
+    NEW._updated_at := NEW.last_refreshed_at;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_linkedin_profiles_refreshed_at ON luma.linkedin_profiles;
+CREATE TRIGGER trg_linkedin_profiles_refreshed_at
+    BEFORE UPDATE ON luma.linkedin_profiles
+    FOR EACH ROW
+    EXECUTE FUNCTION luma.set_linkedin_profiles_refreshed_at();
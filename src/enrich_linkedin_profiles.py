@@ -5,17 +5,146 @@ Fetches LinkedIn profile data for guests and stores in database.
 """
 
 import argparse
-from lib.db.postgres import open_connection, close_connection, execute_query, upsert_multiple_records
-from lib.apify import get_linkedin_profiles
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from lib.db.postgres import (
+    open_connection,
+    close_connection,
+    close_connection_pool,
+    execute_query,
+    prepare_statement,
+    upsert_multiple_records,
+)
+from lib.apify import APIFY_MAX_INFLIGHT, get_linkedin_profiles
 from lib.utils import (
     create_lookup_from_apify_profiles,
     partition_guests_by_profile_availability,
+    serialize_apify_profile,
     build_enriched_profile_record,
     build_missing_profile_record,
+    LinkedInProfileRecord,
 )
 
 
-def fetch_guests_pending_for_enrichment(limit):
+# Default number of guests fetched from the database per batch
+DEFAULT_BATCH_SIZE = 200
+
+# Guests sent to a single Apify run (APIFY_MAX_INFLIGHT caps runs in flight)
+APIFY_CHUNK_SIZE = 50
+
+# Prefix joined to normalized '/in/<handle>' values to build profile URLs
+LINKEDIN_BASE_URL = 'https://www.linkedin.com'
+
+
+# SQL form of normalize_linkedin_handle() over the linkedin_handle column. Matching
+# depends on both producing identical keys; tests/test_handle_normalization.py
+# compares them. Raw string so the regex escapes reach PostgreSQL unchanged.
+_NORMALIZED_HANDLE_SQL = r"""'/in/' || LOWER(BTRIM(
+        regexp_replace(linkedin_handle, '^((https?://)?(www\.)?linkedin\.com)?/*(in/)?', '', 'i'),
+        '/'
+    ))"""
+
+# Two index-friendly branches instead of LEFT JOIN + OR: guests with no profile
+# row at all (anti-join on the unique key's leading column), and failed rows
+# eligible for retry (partial index, see sql/001_linkedin_profiles_retry_index.sql).
+# Each branch is limited on its own so the outer sort only sees 2 * limit rows.
+_PENDING_GUESTS_QUERY = """
+SELECT
+    luma_guest_api_id,
+    guest_name,
+    linkedin_handle,
+    retry_count,
+    {normalized_handle} as normalized_handle
+FROM (
+    (
+        -- Never enriched
+        SELECT
+            g.luma_guest_api_id,
+            g.guest_name,
+            g.linkedin_handle,
+            0 as retry_count,
+            NULL::BIGINT as last_retry_at
+        FROM luma.guests g
+        WHERE g.linkedin_handle IS NOT NULL
+        AND g.luma_guest_api_id <> ALL(%(exclude_guest_ids)s)
+        AND NOT EXISTS (
+            SELECT 1
+            FROM luma.linkedin_profiles lp
+            WHERE lp.luma_guest_api_id = g.luma_guest_api_id
+        )
+        LIMIT %(limit)s
+    )
+    UNION ALL
+    (
+        -- Failed enrichment eligible for retry
+        SELECT
+            g.luma_guest_api_id,
+            g.guest_name,
+            g.linkedin_handle,
+            lp.retry_count,
+            lp.last_retry_at
+        FROM luma.linkedin_profiles lp
+        JOIN luma.guests g
+            ON g.luma_guest_api_id = lp.luma_guest_api_id
+        WHERE lp.profile_found = FALSE
+        AND lp.retry_count < 3
+        AND (lp.next_retry_after IS NULL OR lp.next_retry_after < %(current_timestamp)s)
+        AND g.linkedin_handle IS NOT NULL
+        AND g.luma_guest_api_id <> ALL(%(exclude_guest_ids)s)
+        ORDER BY lp.retry_count ASC, lp.last_retry_at ASC NULLS FIRST
+        LIMIT %(limit)s
+    )
+) pending
+ORDER BY
+    retry_count ASC,  -- Prioritize new attempts
+    last_retry_at ASC NULLS FIRST  -- Then oldest retries
+LIMIT %(limit)s
+""".replace('{normalized_handle}', _NORMALIZED_HANDLE_SQL)
+
+# Same query as a server-side prepared statement, with positional parameters
+_PENDING_GUESTS_STATEMENT = 'pending_guests'
+_PENDING_GUESTS_PREPARED_QUERY = _PENDING_GUESTS_QUERY % {
+    'exclude_guest_ids': '$1',
+    'current_timestamp': '$2',
+    'limit': '$3',
+}
+
+
+# Trigger created by sql/002_linkedin_profiles_refresh_timestamps.sql
+_REFRESH_TIMESTAMP_TRIGGER = 'trg_linkedin_profiles_refreshed_at'
+
+
+def refresh_timestamp_trigger_installed():
+    """
+    Check that the trigger maintaining last_refreshed_at/_updated_at exists.
+
+    Upserts no longer set those columns themselves, so without the
+    sql/002_linkedin_profiles_refresh_timestamps.sql migration they would
+    silently stop changing.
+
+    Returns:
+        bool: True if the trigger exists, False if it is missing,
+              or None if the connection or query failed
+    """
+    if not open_connection():
+        return None
+
+    results = execute_query(
+        """
+        SELECT 1 FROM pg_trigger
+        WHERE tgrelid = 'luma.linkedin_profiles'::regclass AND tgname = %s
+        """,
+        params=(_REFRESH_TIMESTAMP_TRIGGER,),
+        is_select_query=True
+    )
+    close_connection()
+
+    # execute_query() returns None after printing a query error
+    if results is None:
+        return None
+    return bool(results)
+
+
+def fetch_guests_pending_for_enrichment(limit, exclude_guest_ids=()):
     """
     Fetch guests with LinkedIn handles needing enrichment or retry.
 
@@ -26,54 +155,75 @@ def fetch_guests_pending_for_enrichment(limit):
 
     Args:
         limit: Maximum number of guests to fetch
+        exclude_guest_ids: Guest IDs to skip (e.g. a batch still being enriched)
 
     Returns:
-        list: List of tuples (luma_guest_api_id, guest_name, linkedin_handle, retry_count)
-              or None if connection failed
+        list: List of tuples
+              (luma_guest_api_id, guest_name, linkedin_handle, retry_count, normalized_handle)
+              or None if connection failed. normalized_handle is computed in SQL in the
+              same /in/<handle> form as normalize_linkedin_handle().
     """
     import time
     current_timestamp = int(time.time() * 1000)
 
-    query = """
-    SELECT
-        g.luma_guest_api_id,
-        g.guest_name,
-        g.linkedin_handle,
-        COALESCE(lp.retry_count, 0) as retry_count
-    FROM luma.guests g
-    LEFT JOIN luma.linkedin_profiles lp
-        ON lp.luma_guest_api_id = g.luma_guest_api_id
-    WHERE g.linkedin_handle IS NOT NULL
-    AND (
-        -- Never enriched
-        lp.luma_guest_api_id IS NULL
-        OR
-        -- Failed enrichment eligible for retry
-        (
-            lp.profile_found = FALSE
-            AND lp.retry_count < 3
-            AND (lp.next_retry_after IS NULL OR lp.next_retry_after < %s)
-        )
-    )
-    ORDER BY
-        COALESCE(lp.retry_count, 0) ASC,  -- Prioritize new attempts
-        lp.last_retry_at ASC NULLS FIRST  -- Then oldest retries
-    LIMIT %s
-    """
-
     if open_connection():
-        results = execute_query(query, params=(current_timestamp, limit), is_select_query=True)
+        results = None
+        # Prepared once per pooled connection; later batches reuse the cached plan
+        if prepare_statement(_PENDING_GUESTS_STATEMENT, _PENDING_GUESTS_PREPARED_QUERY) is True:
+            results = execute_query(
+                f"EXECUTE {_PENDING_GUESTS_STATEMENT}(%s, %s, %s)",
+                params=(list(exclude_guest_ids), current_timestamp, limit),
+                is_select_query=True
+            )
         close_connection()
         return results
     return None
 
 
+def stream_guests_pending_for_enrichment(limit):
+    """
+    Stream guests needing enrichment through a server-side cursor.
+
+    Yields the same rows as fetch_guests_pending_for_enrichment(), but as they
+    arrive, so Apify runs can be submitted before the whole batch is read. Holds
+    the thread's pooled connection until exhausted. Uses the plain query text,
+    since a server-side cursor cannot be declared over EXECUTE.
+
+    Args:
+        limit: Maximum number of guests to fetch
+
+    Yields:
+        tuple: (luma_guest_api_id, guest_name, linkedin_handle, retry_count, normalized_handle)
+    """
+    import time
+    current_timestamp = int(time.time() * 1000)
+
+    if not open_connection():
+        return
+
+    try:
+        rows = execute_query(
+            _PENDING_GUESTS_QUERY,
+            params={
+                'exclude_guest_ids': [],
+                'current_timestamp': current_timestamp,
+                'limit': limit,
+            },
+            is_select_query=True,
+            stream=True,
+            itersize=APIFY_CHUNK_SIZE
+        )
+        yield from rows
+    finally:
+        close_connection()
+
+
 def upsert_linkedin_profiles(profile_records):
     """
     Batch upsert profile records to database.
 
     Args:
-        profile_records: List of tuples (database records)
+        profile_records: List of LinkedInProfileRecord tuples
 
     Returns:
         bool: True if successful, False otherwise
@@ -82,41 +232,7 @@ def upsert_linkedin_profiles(profile_records):
         print("No records to upsert")
         return True
 
-    # Column order must match the record tuple order in build_*_profile_record()
-    columns = [
-        'luma_guest_api_id',
-        'linkedin_handle',
-        'record_source',
-        'profile_found',
-        'profile_fetch_message',
-        'full_name',
-        'first_name',
-        'last_name',
-        'headline',
-        'about',
-        'public_identifier',
-        'linkedin_url',
-        'connections',
-        'followers',
-        'job_title',
-        'company_name',
-        'company_industry',
-        'company_website',
-        'company_linkedin',
-        'company_founded_in',
-        'company_size',
-        'current_job_duration_yrs',
-        'address_with_country',
-        'address_country_only',
-        'address_without_country',
-        'profile_pic_url',
-        'profile_pic_high_quality_url',
-        'top_skills_by_endorsements',
-        'profile_data',
-        'retry_count',
-        'last_retry_at',
-        'next_retry_after',
-    ]
+    columns = list(LinkedInProfileRecord._fields)
 
     # Columns to detect conflicts (unique constraint)
     conflict_columns = ['luma_guest_api_id', 'linkedin_handle']
@@ -131,7 +247,8 @@ def upsert_linkedin_profiles(profile_records):
                 'luma.linkedin_profiles',
                 columns,
                 conflict_columns,
-                update_columns
+                update_columns,
+                jsonb_columns=['profile_data']
             )
             close_connection()
             return True
@@ -142,44 +259,77 @@ def upsert_linkedin_profiles(profile_records):
     return False
 
 
-def enrich_linkedin_profiles(batch_size):
+def fetch_profile_lookup(linkedin_urls):
     """
-    Main enrichment workflow.
-
-    1. Fetch guests needing enrichment
-    2. Call Apify API to get LinkedIn profiles
-    3. Match returned profiles to guests
-    4. Build database records for matches and misses
-    5. Upsert all records to database
+    Run Apify for a chunk of URLs and index the streamed profiles by handle.
 
     Args:
-        batch_size: Number of guests to process in this batch
+        linkedin_urls: List of full LinkedIn profile URLs
+
+    Returns:
+        dict: Handle → profile dict, from create_lookup_from_apify_profiles()
     """
-    # Step 1: Fetch guests from database
-    pending_guests = fetch_guests_pending_for_enrichment(batch_size)
-    if not pending_guests:
-        print("No guests need LinkedIn enrichment")
-        return
+    return create_lookup_from_apify_profiles(get_linkedin_profiles(linkedin_urls))
 
-    # Count retries vs new attempts
-    retry_counts = [guest[3] if len(guest) > 3 else 0 for guest in pending_guests]
-    new_attempts = sum(1 for count in retry_counts if count == 0)
-    retries = len(pending_guests) - new_attempts
 
-    print(f"Found {len(pending_guests)} guests needing enrichment")
-    if retries > 0:
-        print(f"  - {new_attempts} new attempts")
-        print(f"  - {retries} retries")
+def submit_profile_chunks(executor, guests):
+    """
+    Read a batch of guests and submit one Apify run per APIFY_CHUNK_SIZE handles.
 
-    # Step 2: Build LinkedIn URLs and call Apify API
-    linkedin_urls = [
-        f"https://www.linkedin.com{guest[2]}"
-        for guest in pending_guests
-    ]
-    apify_profiles = get_linkedin_profiles(linkedin_urls)
+    Chunks are submitted as soon as they fill, so with a streamed batch the
+    first Apify runs start while later rows are still being read. Guests that
+    share a handle are scraped once: later duplicates join the chunk holding
+    the first one and are matched against that chunk's profile lookup.
 
-    # Step 3: Create lookup and partition guests
-    profile_lookup = create_lookup_from_apify_profiles(apify_profiles)
+    Args:
+        executor: ThreadPoolExecutor running fetch_profile_lookup()
+        guests: Iterable of guest tuples (a list or a database stream)
+
+    Returns:
+        tuple: (pending_guests, chunk_futures)
+            pending_guests: List of every guest read
+            chunk_futures: {future: guest chunk} for each submitted run
+    """
+    pending_guests = []
+    chunk_futures = {}
+    chunk_by_handle = {}
+    chunk = []
+    handles = []
+
+    def submit(chunk, handles):
+        linkedin_urls = list(map(LINKEDIN_BASE_URL.__add__, handles))
+        chunk_futures[executor.submit(fetch_profile_lookup, linkedin_urls)] = chunk
+
+    for guest in guests:
+        pending_guests.append(guest)
+        handle = guest[4]
+        if handle in chunk_by_handle:
+            chunk_by_handle[handle].append(guest)
+            continue
+        chunk_by_handle[handle] = chunk
+        chunk.append(guest)
+        handles.append(handle)
+        if len(handles) == APIFY_CHUNK_SIZE:
+            submit(chunk, handles)
+            chunk = []
+            handles = []
+    if handles:
+        submit(chunk, handles)
+
+    return pending_guests, chunk_futures
+
+
+def build_profile_records(pending_guests, profile_lookup):
+    """
+    Match Apify profiles to guests and build database records for both outcomes.
+
+    Args:
+        pending_guests: List of guest tuples sent to Apify
+        profile_lookup: Handle → profile dict from create_lookup_from_apify_profiles()
+
+    Returns:
+        tuple: (enriched_records, missing_records)
+    """
     guests_with_profiles, guests_without_profiles = partition_guests_by_profile_availability(
         pending_guests,
         profile_lookup
@@ -187,26 +337,118 @@ def enrich_linkedin_profiles(batch_size):
 
     print(f"Matched {len(guests_with_profiles)} profiles, {len(guests_without_profiles)} missing")
 
-    # Step 4: Build database records
+    # Encode each returned profile once, even when several guests share it
+    profile_jsons = {
+        id(profile): serialize_apify_profile(profile)
+        for profile in profile_lookup.values()
+    }
     enriched_records = [
-        build_enriched_profile_record(profile, guest)
+        build_enriched_profile_record(profile, guest, profile_jsons[id(profile)])
         for profile, guest in guests_with_profiles
     ]
     missing_records = [
-        build_missing_profile_record(guest)
+        build_missing_profile_record(guest[0], guest[2], guest[3] or 0)
         for guest in guests_without_profiles
     ]
+    return enriched_records, missing_records
+
 
-    # Step 5: Upsert to database
-    all_records = enriched_records + missing_records
-    success = upsert_linkedin_profiles(all_records)
+def save_profile_records(enriched_records, missing_records, totals):
+    """
+    Upsert one chunk of records and add the outcome to the running totals.
+
+    Args:
+        enriched_records: Records for guests whose profile was found
+        missing_records: Records for guests whose profile was not found
+        totals: Dict of 'enriched', 'missing' and 'failed' counts, updated in place
+    """
+    if upsert_linkedin_profiles(enriched_records + missing_records):
+        totals['enriched'] += len(enriched_records)
+        totals['missing'] += len(missing_records)
+    else:
+        totals['failed'] += len(enriched_records) + len(missing_records)
+
+
+def enrich_linkedin_profiles(count, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Main enrichment workflow.
+
+    Processes up to `count` guests in batches of `batch_size`:
+
+    1. Read guests needing enrichment (the first batch is streamed)
+    2. Submit an Apify run per chunk as it fills, up to APIFY_MAX_INFLIGHT at once
+    3. While those runs are in flight, save the previous batch's chunks as they
+       complete, then prefetch the next batch
+    4. For each completed chunk, match its profiles and build database records
+    5. Upsert that chunk's records straight away
 
-    if success:
+    Args:
+        count: Total number of guests to process
+        batch_size: Number of guests fetched from the database per batch
+    """
+    trigger_installed = refresh_timestamp_trigger_installed()
+    if trigger_installed is None:
+        print("❌ Could not reach the database to check luma.linkedin_profiles")
+        return
+    if not trigger_installed:
+        print("❌ Refresh timestamp trigger not found on luma.linkedin_profiles")
+        print("   Apply sql/002_linkedin_profiles_refresh_timestamps.sql before enriching")
+        return
+
+    # Step 1: Stream the first batch of guests from database
+    guests = stream_guests_pending_for_enrichment(min(batch_size, count))
+
+    remaining = count
+    totals = {'enriched': 0, 'missing': 0, 'failed': 0}
+    previous_chunk_futures = {}
+
+    with ThreadPoolExecutor(max_workers=APIFY_MAX_INFLIGHT) as executor:
+        while True:
+            # Step 2: Submit one Apify run per chunk; the executor caps runs in flight,
+            # so this batch queues behind the previous batch's runs, not behind its upserts
+            pending_guests, chunk_futures = submit_profile_chunks(executor, guests)
+
+            # Steps 3-5: Build and upsert the previous batch chunk by chunk as runs finish
+            for future in as_completed(previous_chunk_futures):
+                records = build_profile_records(previous_chunk_futures[future], future.result())
+                save_profile_records(*records, totals)
+            previous_chunk_futures = chunk_futures
+
+            if not pending_guests:
+                break
+
+            remaining -= len(pending_guests)
+
+            # Count retries vs new attempts
+            retry_counts = [guest[3] if len(guest) > 3 else 0 for guest in pending_guests]
+            new_attempts = sum(1 for retry_count in retry_counts if retry_count == 0)
+            retries = len(pending_guests) - new_attempts
+
+            print(f"Found {len(pending_guests)} guests needing enrichment")
+            if retries > 0:
+                print(f"  - {new_attempts} new attempts")
+                print(f"  - {retries} retries")
+
+            # Prefetch the next batch while Apify scrapes this one. Earlier batches
+            # are saved by now, so only this batch's guests need excluding.
+            guests = []
+            if remaining > 0:
+                guests = fetch_guests_pending_for_enrichment(
+                    min(batch_size, remaining),
+                    exclude_guest_ids=[guest[0] for guest in pending_guests]
+                ) or []
+
+    if remaining == count:
+        print("No guests need LinkedIn enrichment")
+    elif totals['failed'] == 0:
         print(f"✅ LinkedIn enrichment complete!")
-        print(f"   Enriched: {len(enriched_records)}")
-        print(f"   Missing: {len(missing_records)}")
+        print(f"   Enriched: {totals['enriched']}")
+        print(f"   Missing: {totals['missing']}")
     else:
         print("❌ Failed to save records to database")
+        print(f"   Enriched: {totals['enriched']}")
+        print(f"   Missing: {totals['missing']}")
+        print(f"   Not saved: {totals['failed']}")
 
 
 def main():
@@ -220,6 +462,12 @@ def main():
         default=5,
         help='Number of profiles to enrich (default: 5)'
     )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f'Number of profiles fetched from the database per batch (default: {DEFAULT_BATCH_SIZE})'
+    )
     parser.add_argument(
         '--profiles',
         type=str,
@@ -234,7 +482,10 @@ def main():
         print(f"Manual mode not yet implemented")
         print(f"Will process: {args.profiles}")
     else:
-        enrich_linkedin_profiles(args.count)
+        try:
+            enrich_linkedin_profiles(args.count, args.batch_size)
+        finally:
+            close_connection_pool()
 
 
 if __name__ == '__main__':
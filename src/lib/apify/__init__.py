@@ -1,5 +1,13 @@
 """Apify API client library for profile scraping."""
 
-from .linkedin_scraper import get_linkedin_profiles, get_single_linkedin_profile
+from .linkedin_scraper import (
+    APIFY_MAX_INFLIGHT,
+    get_linkedin_profiles,
+    get_single_linkedin_profile,
+)
 
-__all__ = ['get_linkedin_profiles', 'get_single_linkedin_profile']
+__all__ = [
+    'APIFY_MAX_INFLIGHT',
+    'get_linkedin_profiles',
+    'get_single_linkedin_profile',
+]
@@ -1,47 +1,75 @@
 """
 LinkedIn profile scraper using Apify SDK.
 
-This module provides a function to fetch LinkedIn profiles in batch using
-the Apify LinkedIn Profile Scraper actor.
+This module provides functions to fetch LinkedIn profiles in batch using
+the Apify LinkedIn Profile Scraper actor. Each fetch blocks until its run
+finishes; callers overlap runs by calling get_linkedin_profiles() from threads.
 """
 
 import os
+import threading
 from apify_client import ApifyClient
 from dotenv import load_dotenv, find_dotenv
 
 # Load environment variables
 load_dotenv(find_dotenv('.env.local'))
 
+_ACTOR_ID = os.getenv('APIFY_LINKEDIN_ACTOR_ID', '2SyF0bVxmgGr8IVCZ')
+
+# Caps concurrent actor runs across all threads so large batches don't trigger
+# Apify throttling (whose failed runs would come back as misses and retries).
+# Exported so callers can size their worker pools to match.
+APIFY_MAX_INFLIGHT = int(os.getenv('APIFY_MAX_INFLIGHT', '4'))
+_inflight_runs = threading.BoundedSemaphore(APIFY_MAX_INFLIGHT)
+
+# Shared client, created on first use so every run reuses its HTTPS keep-alive pool
+_client = None
+_client_lock = threading.Lock()
+
+
+def _get_client():
+    """
+    Return the shared ApifyClient, creating it from APIFY_API_TOKEN on first use.
+
+    Raises:
+        Exception: If APIFY_API_TOKEN not set in environment
+    """
+    global _client
+
+    with _client_lock:
+        if _client is None:
+            api_token = os.getenv('APIFY_API_TOKEN')
+
+            if not api_token:
+                raise Exception("APIFY_API_TOKEN not set in environment")
+
+            _client = ApifyClient(api_token)
+        return _client
+
 
 def get_linkedin_profiles(linkedin_urls):
     """
     Fetch LinkedIn profiles from Apify API.
 
     Returns raw profile data exactly as Apify returns it.
-    No processing, no filtering, no mapping.
+    No processing, no filtering, no mapping. Blocks while APIFY_MAX_INFLIGHT
+    runs (default 4) are already in progress in this process.
 
     Args:
         linkedin_urls (list): List of full LinkedIn profile URLs
                              e.g., ["https://www.linkedin.com/in/artsofbaniya"]
 
     Returns:
-        list: Raw profile dicts from Apify API response.
-              May return fewer profiles than input URLs if some profiles
-              are unavailable, private, or invalid.
-              Empty list if API error occurs.
+        iterator: Raw profile dicts from the Apify run's dataset, streamed page by
+                  page so the caller can consume them without buffering the whole run.
+                  May yield fewer profiles than input URLs if some profiles
+                  are unavailable, private, or invalid.
+                  Empty if API error occurs.
 
     Raises:
         Exception: If APIFY_API_TOKEN not set in environment
     """
-    # Get credentials from environment
-    api_token = os.getenv('APIFY_API_TOKEN')
-    actor_id = os.getenv('APIFY_LINKEDIN_ACTOR_ID', '2SyF0bVxmgGr8IVCZ')
-
-    if not api_token:
-        raise Exception("APIFY_API_TOKEN not set in environment")
-
-    # Initialize the ApifyClient with API token
-    client = ApifyClient(api_token)
+    client = _get_client()
 
     # Prepare the Actor input (following Apify documentation pattern)
     run_input = {
@@ -51,19 +79,39 @@ def get_linkedin_profiles(linkedin_urls):
     print(f"Fetching {len(linkedin_urls)} LinkedIn profiles from Apify...")
 
     try:
-        # Run the Actor and wait for it to finish
-        run = client.actor(actor_id).call(run_input=run_input)
+        # Hold a slot until the run finishes; reading the dataset needs none
+        with _inflight_runs:
+            # Run the Actor and wait for it to finish
+            run = client.actor(_ACTOR_ID).call(run_input=run_input)
         print(f"Actor run completed. Run ID: {run.get('id')}")
+        dataset_id = run["defaultDatasetId"]
+    except Exception as e:
+        print(f"Apify API error: {e}")
+        return iter(())
+
+    return _iterate_dataset_profiles(client, dataset_id)
 
-        # Fetch Actor results from the run's dataset
-        profiles = list(client.dataset(run["defaultDatasetId"]).iterate_items())
 
-        print(f"Apify returned {len(profiles)} profiles")
-        return profiles
+def _iterate_dataset_profiles(client, dataset_id):
+    """
+    Yield profiles from an Apify dataset as its pages are fetched.
+
+    Args:
+        client: ApifyClient instance
+        dataset_id (str): Dataset holding the actor run results
 
+    Yields:
+        dict: Raw profile dict. Stops early (after logging) on API error.
+    """
+    profile_count = 0
+    try:
+        for profile in client.dataset(dataset_id).iterate_items():
+            profile_count += 1
+            yield profile
     except Exception as e:
         print(f"Apify API error: {e}")
-        return []
+
+    print(f"Apify returned {profile_count} profiles")
 
 
 def get_single_linkedin_profile(linkedin_url):
@@ -76,5 +124,4 @@ def get_single_linkedin_profile(linkedin_url):
     Returns:
         dict: Profile dictionary or None if error
     """
-    profiles = get_linkedin_profiles([linkedin_url])
-    return profiles[0] if profiles else None
+    return next(get_linkedin_profiles([linkedin_url]), None)
@@ -3,8 +3,10 @@
 from .postgres import (
     open_connection,
     close_connection,
+    close_connection_pool,
     insert_record,
     execute_query,
+    prepare_statement,
     insert_multiple_records,
     upsert_multiple_records,
 )
@@ -12,8 +14,10 @@ from .postgres import (
 __all__ = [
     'open_connection',
     'close_connection',
+    'close_connection_pool',
     'insert_record',
     'execute_query',
+    'prepare_statement',
     'insert_multiple_records',
     'upsert_multiple_records',
 ]
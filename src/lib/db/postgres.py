@@ -12,22 +12,49 @@ Usage:
     close_connection()
 """
 
+import io
+import itertools
 import os
 import sys
+import threading
+import weakref
 import psycopg2
+from psycopg2 import pool
 from psycopg2.extras import execute_values
 from dotenv import load_dotenv, find_dotenv
 
 # Load environment variables from .env.local
 load_dotenv(find_dotenv('.env.local'))
 
-# Global connection object
-_connection = None
+# Default upper bound on pooled connections ({PREFIX}_PG_DB_POOL_SIZE overrides)
+DEFAULT_POOL_SIZE = 5
 
+# Upserts of at least this many records are staged with COPY instead of execute_values
+COPY_UPSERT_THRESHOLD = 1000
 
-def create_connection(db_name, user, password, host, port):
+# Characters that must be backslash-escaped in COPY text format
+_COPY_TEXT_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+# Global connection pool, created on first open_connection()
+_pool = None
+_pool_lock = threading.Lock()
+
+# Connection checked out by the current thread
+_local = threading.local()
+
+# Default rows fetched per round trip when streaming through a server-side cursor
+DEFAULT_STREAM_ITERSIZE = 2000
+
+# Suffixes for server-side cursor names, which must be unique per connection
+_stream_cursor_ids = itertools.count()
+
+# Names of statements PREPAREd on each connection (prepared statements live per session)
+_prepared_statements = weakref.WeakKeyDictionary()
+
+
+def create_connection_pool(db_name, user, password, host, port, max_connections=DEFAULT_POOL_SIZE):
     """
-    Create a connection to the PostgreSQL database.
+    Create a thread-safe pool of connections to the PostgreSQL database.
 
     Args:
         db_name (str): Database name
@@ -35,30 +62,71 @@ def create_connection(db_name, user, password, host, port):
         password (str): Database password
         host (str): Database host
         port (str): Database port
+        max_connections (int): Maximum number of pooled connections
 
     Returns:
-        psycopg2.connection: Database connection object or None if failed
+        psycopg2.pool.ThreadedConnectionPool: Connection pool or None if failed
     """
-    connection = None
+    connection_pool = None
     try:
-        connection = psycopg2.connect(
+        connection_pool = pool.ThreadedConnectionPool(
+            minconn=1,
+            maxconn=max_connections,
             dbname=db_name,
             user=user,
             password=password,
             host=host,
             port=port
         )
-        print("Connection to the database successful")
+        print("Connection pool to the database created")
     except psycopg2.Error as e:
         print(f"The error '{e}' occurred")
-    return connection
+    return connection_pool
+
+
+def _get_pool():
+    """
+    Return the global connection pool, creating it from environment variables on first use.
+
+    Returns:
+        psycopg2.pool.ThreadedConnectionPool: Connection pool or None if failed
+    """
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            return _pool
+
+        service_prefix = os.getenv('DB_SERVICE_PREFIX')
+        if not service_prefix:
+            print('Error: DB_SERVICE_PREFIX not set in environment')
+            return None
+
+        dbname = os.getenv(f'{service_prefix}_PG_DB_NAME')
+        user = os.getenv(f'{service_prefix}_PG_DB_USER')
+        password = os.getenv(f'{service_prefix}_PG_DB_PASSWORD')
+        host = os.getenv(f'{service_prefix}_PG_DB_HOST')
+        port = os.getenv(f'{service_prefix}_PG_DB_PORT')
+        max_connections = int(os.getenv(f'{service_prefix}_PG_DB_POOL_SIZE', DEFAULT_POOL_SIZE))
+
+        _pool = create_connection_pool(dbname, user, password, host, port, max_connections)
+        return _pool
+
+
+def _resolve_connection(conn=None):
+    """Return the explicit connection if given, else the one checked out by this thread."""
+    if conn is not None:
+        return conn
+    return getattr(_local, 'connection', None)
 
 
 def open_connection():
     """
-    Open a database connection using environment variables.
+    Check out a pooled database connection for the current thread.
 
-    Reads database credentials from environment variables prefixed with DB_SERVICE_PREFIX.
+    The pool is created on first call from environment variables prefixed with
+    DB_SERVICE_PREFIX, so later calls reuse warm connections instead of paying
+    for a new TCP/TLS/auth handshake every time.
     Expected env vars:
         - DB_SERVICE_PREFIX
         - {PREFIX}_PG_DB_NAME
@@ -66,41 +134,49 @@ def open_connection():
         - {PREFIX}_PG_DB_PASSWORD
         - {PREFIX}_PG_DB_HOST
         - {PREFIX}_PG_DB_PORT
+        - {PREFIX}_PG_DB_POOL_SIZE (optional, default 5)
 
     Returns:
         bool: True if connection successful, False otherwise
     """
-    global _connection
+    if getattr(_local, 'connection', None) is not None:
+        return True
 
-    service_prefix = os.getenv('DB_SERVICE_PREFIX')
-    if not service_prefix:
-        print('Error: DB_SERVICE_PREFIX not set in environment')
+    connection_pool = _get_pool()
+    if connection_pool is None:
+        print('Error opening connection')
         return False
 
-    dbname = os.getenv(f'{service_prefix}_PG_DB_NAME')
-    user = os.getenv(f'{service_prefix}_PG_DB_USER')
-    password = os.getenv(f'{service_prefix}_PG_DB_PASSWORD')
-    host = os.getenv(f'{service_prefix}_PG_DB_HOST')
-    port = os.getenv(f'{service_prefix}_PG_DB_PORT')
-
-    _connection = create_connection(dbname, user, password, host, port)
-
-    if _connection:
+    try:
+        _local.connection = connection_pool.getconn()
         return True
-    else:
+    except psycopg2.Error as e:
+        print(f"The error '{e}' occurred")
         print('Error opening connection')
         return False
 
 
 def close_connection():
-    """Close the global database connection."""
-    global _connection
-    if _connection:
-        _connection.close()
-        print("Connection closed")
+    """Return the current thread's connection to the pool."""
+    connection = getattr(_local, 'connection', None)
+    if connection is not None:
+        _local.connection = None
+        _pool.putconn(connection)
 
 
-def insert_record(record, schema_and_table, inserted_columns):
+def close_connection_pool():
+    """Close every pooled connection. Call once at process shutdown."""
+    global _pool
+
+    close_connection()
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+            print("Connection pool closed")
+
+
+def insert_record(record, schema_and_table, inserted_columns, conn=None):
     """
     Insert a single record into the database.
 
@@ -108,30 +184,33 @@ def insert_record(record, schema_and_table, inserted_columns):
         record (tuple): Values to insert
         schema_and_table (str): Table name (e.g., 'public.users' or 'users')
         inserted_columns (list): List of column names
+        conn (optional): Connection to use instead of the thread's checked-out one
 
     Returns:
         int: -1 if connection not available, None otherwise
     """
-    if not _connection:
+    connection = _resolve_connection(conn)
+    if not connection:
         return -1
 
     inserted_columns_string = ', '.join(inserted_columns)
     values_placeholder_string = ', '.join(['%s' for _ in inserted_columns])
-    cursor = _connection.cursor()
+    cursor = connection.cursor()
 
     try:
         cursor.execute(f"""
             INSERT INTO {schema_and_table} ({inserted_columns_string})
             VALUES ({values_placeholder_string})
         """, record)
-        _connection.commit()
+        connection.commit()
         print("Record inserted successfully")
     except psycopg2.Error as e:
-        _connection.rollback()
+        connection.rollback()
         print(f"The error '{e}' occurred")
 
 
-def execute_query(query, params=None, is_select_query=False, is_insert_or_update_query=False):
+def execute_query(query, params=None, is_select_query=False, is_insert_or_update_query=False,
+                  stream=False, itersize=DEFAULT_STREAM_ITERSIZE, conn=None):
     """
     Execute a SQL query.
 
@@ -140,16 +219,26 @@ def execute_query(query, params=None, is_select_query=False, is_insert_or_update
         params (tuple, optional): Query parameters
         is_select_query (bool): If True, returns fetched results
         is_insert_or_update_query (bool): If True, commits the transaction
+        stream (bool): With is_select_query, return a generator that reads rows
+            through a server-side cursor instead of buffering them all
+        itersize (int): Rows fetched per round trip when streaming
+        conn (optional): Connection to use instead of the thread's checked-out one
 
     Returns:
         list: Query results if is_select_query=True
+        generator: Result rows if is_select_query=True and stream=True. The
+            connection must stay checked out until the generator is exhausted.
         int: -1 if connection not available
         None: Otherwise
     """
-    if not _connection:
+    connection = _resolve_connection(conn)
+    if not connection:
         return -1
 
-    cursor = _connection.cursor()
+    if is_select_query and stream:
+        return _stream_query(connection, query, params, itersize)
+
+    cursor = connection.cursor()
 
     try:
         cursor.execute(query, params)
@@ -158,14 +247,68 @@ def execute_query(query, params=None, is_select_query=False, is_insert_or_update
             return cursor.fetchall()
 
         if is_insert_or_update_query:
-            _connection.commit()
+            connection.commit()
             print("Query executed successfully")
     except psycopg2.Error as e:
-        _connection.rollback()
+        connection.rollback()
         print(f"The error '{e}' occurred")
 
 
-def insert_multiple_records(records, schema_and_table, inserted_columns, ignore_conflicts=False):
+def _stream_query(connection, query, params, itersize):
+    """Yield rows of a SELECT from a named (server-side) cursor, itersize rows at a time."""
+    cursor = connection.cursor(name=f'stream_cursor_{next(_stream_cursor_ids)}')
+    cursor.itersize = itersize
+
+    try:
+        cursor.execute(query, params)
+        yield from cursor
+        cursor.close()
+        # End the read transaction that kept the cursor's portal open
+        connection.commit()
+    except psycopg2.Error as e:
+        connection.rollback()
+        print(f"The error '{e}' occurred")
+
+
+def prepare_statement(name, query, conn=None):
+    """
+    Create a server-side prepared statement, once per pooled connection.
+
+    Postgres keeps the parsed (and eventually cached) plan for the lifetime of the
+    session, so repeated EXECUTEs skip parse and plan. Because pooled connections
+    are reused, the statement is only prepared the first time a connection sees it.
+
+    Args:
+        name (str): Statement name, later run with "EXECUTE name(...)"
+        query (str): SQL using $1, $2, ... positional parameters
+        conn (optional): Connection to use instead of the thread's checked-out one
+
+    Returns:
+        bool: True if the statement is prepared, False otherwise
+        int: -1 if connection not available
+    """
+    connection = _resolve_connection(conn)
+    if not connection:
+        return -1
+
+    prepared = _prepared_statements.setdefault(connection, set())
+    if name in prepared:
+        return True
+
+    cursor = connection.cursor()
+
+    try:
+        cursor.execute(f"PREPARE {name} AS {query}")
+        connection.commit()
+        prepared.add(name)
+        return True
+    except psycopg2.Error as e:
+        connection.rollback()
+        print(f"The error '{e}' occurred")
+        return False
+
+
+def insert_multiple_records(records, schema_and_table, inserted_columns, ignore_conflicts=False, conn=None):
     """
     Insert multiple records into the database efficiently.
 
@@ -174,15 +317,17 @@ def insert_multiple_records(records, schema_and_table, inserted_columns, ignore_
         schema_and_table (str): Table name (e.g., 'public.users' or 'users')
         inserted_columns (list): List of column names
         ignore_conflicts (bool): If True, adds ON CONFLICT DO NOTHING clause
+        conn (optional): Connection to use instead of the thread's checked-out one
 
     Returns:
         int: -1 if connection not available, None otherwise
     """
-    if not _connection:
+    connection = _resolve_connection(conn)
+    if not connection:
         return -1
 
     inserted_columns_string = ', '.join(inserted_columns)
-    cursor = _connection.cursor()
+    cursor = connection.cursor()
 
     query_string = f"""
         INSERT INTO {schema_and_table} ({inserted_columns_string})
@@ -194,53 +339,126 @@ def insert_multiple_records(records, schema_and_table, inserted_columns, ignore_
 
     try:
         execute_values(cursor, query_string, records)
-        _connection.commit()
+        connection.commit()
         print("Records inserted successfully")
     except psycopg2.Error as e:
-        _connection.rollback()
+        connection.rollback()
         print(f"The error '{e}' occurred")
 
 
-def upsert_multiple_records(records, schema_and_table, inserted_columns, conflict_columns, update_columns):
+def upsert_multiple_records(records, schema_and_table, inserted_columns, conflict_columns, update_columns,
+                            jsonb_columns=None, conn=None):
     """
     Upsert multiple records efficiently using ON CONFLICT DO UPDATE.
 
+    Small batches are sent with execute_values; batches of COPY_UPSERT_THRESHOLD
+    records or more are COPYed into a temp staging table and merged in one statement.
+
     Args:
         records (list): List of tuples containing values to insert
         schema_and_table (str): Table name (e.g., 'luma.linkedin_profiles')
         inserted_columns (list): List of all column names for INSERT
         conflict_columns (list): List of columns for conflict detection
         update_columns (list): List of columns to update on conflict
+        jsonb_columns (list, optional): Columns whose values are JSON strings to cast to JSONB
+        conn (optional): Connection to use instead of the thread's checked-out one
 
     Returns:
         int: -1 if connection not available, None otherwise
+
+    Raises:
+        psycopg2.Error: If the upsert fails (the transaction is rolled back)
+        TypeError: If a batch taking the COPY path holds a non-scalar value
     """
-    if not _connection:
+    connection = _resolve_connection(conn)
+    if not connection:
         return -1
 
+    jsonb_columns = set(jsonb_columns or ())
     inserted_columns_string = ', '.join(inserted_columns)
     conflict_columns_string = ', '.join(conflict_columns)
-    cursor = _connection.cursor()
+    cursor = connection.cursor()
 
     # Build UPDATE SET clause
-    update_set_parts = [f"{col} = EXCLUDED.{col}" for col in update_columns]
-    # Add timestamp update
-    update_set_parts.append("last_refreshed_at = (extract(epoch FROM now())*1000)::BIGINT")
-    update_set_parts.append("_updated_at = (extract(epoch FROM now())*1000)::BIGINT")
-    update_set_string = ', '.join(update_set_parts)
-
-    query_string = f"""
-        INSERT INTO {schema_and_table} ({inserted_columns_string})
-        VALUES %s
-        ON CONFLICT ({conflict_columns_string})
-        DO UPDATE SET {update_set_string}
-    """
+    update_set_string = ', '.join(f"{col} = EXCLUDED.{col}" for col in update_columns)
 
     try:
-        execute_values(cursor, query_string, records)
-        _connection.commit()
+        if len(records) >= COPY_UPSERT_THRESHOLD:
+            _copy_upsert(
+                cursor,
+                records,
+                schema_and_table,
+                inserted_columns_string,
+                conflict_columns_string,
+                update_set_string
+            )
+        else:
+            query_string = f"""
+                INSERT INTO {schema_and_table} ({inserted_columns_string})
+                VALUES %s
+                ON CONFLICT ({conflict_columns_string})
+                DO UPDATE SET {update_set_string}
+            """
+            # Cast JSON columns explicitly and send the whole batch as one statement
+            # (execute_values defaults to pages of 100 rows, one round trip each)
+            template = '(' + ', '.join(
+                '%s::jsonb' if col in jsonb_columns else '%s' for col in inserted_columns
+            ) + ')'
+            execute_values(cursor, query_string, records, template=template, page_size=max(len(records), 1000))
+        connection.commit()
         print(f"Successfully upserted {len(records)} records")
     except psycopg2.Error as e:
-        _connection.rollback()
+        connection.rollback()
         print(f"Upsert error: {e}")
         raise
+
+
+def _copy_text_value(value):
+    """
+    Render a single scalar value as a COPY text-format field.
+
+    Raises:
+        TypeError: For containers and binary values, whose str() is a Python
+                   repr rather than a PostgreSQL literal (serialize JSON first)
+    """
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (list, tuple, dict, set, frozenset, bytes, bytearray, memoryview)):
+        raise TypeError(f"Cannot COPY a {type(value).__name__} value; pass scalars or serialized JSON")
+    return str(value).translate(_COPY_TEXT_ESCAPES)
+
+
+def _copy_upsert(cursor, records, schema_and_table, inserted_columns_string, conflict_columns_string,
+                 update_set_string):
+    """
+    Upsert records by COPYing them into a temp staging table and merging server-side.
+
+    COPY streams rows without per-statement parsing or literal escaping, so the
+    only planned statement is the single INSERT ... SELECT that merges the stage.
+    Runs inside the caller's transaction; the staging table is dropped on commit.
+    """
+    stage_table = f"stage_{schema_and_table.rsplit('.', 1)[-1]}"
+
+    buffer = io.StringIO()
+    for record in records:
+        buffer.write('\t'.join(map(_copy_text_value, record)))
+        buffer.write('\n')
+    buffer.seek(0)
+
+    cursor.execute(f"""
+        CREATE TEMP TABLE {stage_table}
+        (LIKE {schema_and_table} INCLUDING DEFAULTS)
+        ON COMMIT DROP
+    """)
+    cursor.copy_expert(
+        f"COPY {stage_table} ({inserted_columns_string}) FROM STDIN WITH (FORMAT text)",
+        buffer
+    )
+    cursor.execute(f"""
+        INSERT INTO {schema_and_table} ({inserted_columns_string})
+        SELECT {inserted_columns_string} FROM {stage_table}
+        ON CONFLICT ({conflict_columns_string})
+        DO UPDATE SET {update_set_string}
+    """)
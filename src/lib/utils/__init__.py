@@ -1,19 +1,23 @@
 """Utility functions for profile enrichment."""
 
 from .linkedin_profile_utils import (
+    LinkedInProfileRecord,
     normalize_linkedin_handle,
     create_lookup_from_apify_profiles,
     match_guest_to_apify_profile,
     partition_guests_by_profile_availability,
+    serialize_apify_profile,
     build_enriched_profile_record,
     build_missing_profile_record,
 )
 
 __all__ = [
+    'LinkedInProfileRecord',
     'normalize_linkedin_handle',
     'create_lookup_from_apify_profiles',
     'match_guest_to_apify_profile',
     'partition_guests_by_profile_availability',
+    'serialize_apify_profile',
     'build_enriched_profile_record',
     'build_missing_profile_record',
 ]
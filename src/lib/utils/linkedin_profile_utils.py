@@ -4,15 +4,96 @@ LinkedIn profile processing utilities.
 Functions for processing raw Apify profile data and matching to guests.
 """
 
-import json
-
-
+import re
+import sys
+import time
+from collections import namedtuple
+from functools import lru_cache
+from operator import itemgetter
+import orjson
+
+# Matches an optional LinkedIn origin followed by an optional /in/ path prefix
+_HANDLE_PREFIX_RE = re.compile(r'^(?:(?:https?://)?(?:www\.)?linkedin\.com)?/*(?:in/)?', re.IGNORECASE)
+
+# Apify profile keys copied into columns, in record order (full_name .. top_skills_by_endorsements)
+_APIFY_PROFILE_FIELDS = (
+    'fullName',
+    'firstName',
+    'lastName',
+    'headline',
+    'about',
+    'publicIdentifier',
+    'linkedinUrl',
+    'connections',
+    'followers',
+    'jobTitle',
+    'companyName',
+    'companyIndustry',
+    'companyWebsite',
+    'companyLinkedin',
+    'companyFoundedIn',
+    'companySize',
+    'currentJobDurationInYrs',
+    'addressWithCountry',
+    'addressCountryOnly',
+    'addressWithoutCountry',
+    'profilePic',
+    'profilePicHighQuality',
+    'topSkillsByEndorsements',
+)
+_get_apify_profile_fields = itemgetter(*_APIFY_PROFILE_FIELDS)
+# Placeholder values for those columns when no profile was found
+_MISSING_PROFILE_FIELDS = (None,) * len(_APIFY_PROFILE_FIELDS)
+
+
+# Row written to luma.linkedin_profiles; field names are the table's column names
+LinkedInProfileRecord = namedtuple('LinkedInProfileRecord', (
+    'luma_guest_api_id',
+    'linkedin_handle',
+    'record_source',
+    'profile_found',
+    'profile_fetch_message',
+    'full_name',
+    'first_name',
+    'last_name',
+    'headline',
+    'about',
+    'public_identifier',
+    'linkedin_url',
+    'connections',
+    'followers',
+    'job_title',
+    'company_name',
+    'company_industry',
+    'company_website',
+    'company_linkedin',
+    'company_founded_in',
+    'company_size',
+    'current_job_duration_yrs',
+    'address_with_country',
+    'address_country_only',
+    'address_without_country',
+    'profile_pic_url',
+    'profile_pic_high_quality_url',
+    'top_skills_by_endorsements',
+    'profile_data',
+    'retry_count',
+    'last_retry_at',
+    'next_retry_after',
+))
+
+
+@lru_cache(maxsize=4096)
 def normalize_linkedin_handle(linkedin_url_or_handle):
     """
     Normalize LinkedIn handle to /in/<handle> format for comparison.
 
+    Results are memoized, since the same handles recur across chunks and
+    retries; call normalize_linkedin_handle.cache_clear() to reset.
+
     Examples:
         "https://linkedin.com/in/artsofbaniya/" → "/in/artsofbaniya"
+        "www.linkedin.com/in/artsofbaniya" → "/in/artsofbaniya"
         "/in/ArtsOfBaniya" → "/in/artsofbaniya"
         "artsofbaniya" → "/in/artsofbaniya"
 
@@ -22,38 +103,39 @@ def normalize_linkedin_handle(linkedin_url_or_handle):
     Returns:
         str: Normalized format /in/<handle> in lowercase
     """
-    # Remove URL prefixes if present
-    handle = linkedin_url_or_handle.replace('https://www.linkedin.com', '')
-    handle = handle.replace('https://linkedin.com', '')
-    handle = handle.replace('http://www.linkedin.com', '')
-    handle = handle.strip('/')
+    # Already canonical (e.g. normalized upstream): skip the regex and rebuild
+    if (linkedin_url_or_handle.startswith('/in/')
+            and linkedin_url_or_handle.islower()
+            and '/' not in linkedin_url_or_handle[4:]):
+        return sys.intern(linkedin_url_or_handle)
 
-    # Ensure /in/ prefix
-    if not handle.startswith('in/'):
-        handle = f'in/{handle}'
-
-    # Add leading slash and lowercase
-    return f'/{handle}'.lower()
+    # Strip URL origin and /in/ prefix in one pass, then rebuild the canonical form
+    handle = _HANDLE_PREFIX_RE.sub('', linkedin_url_or_handle, count=1).strip('/')
+    # Interned so lookup keys and memoized results share one object per handle
+    return sys.intern(f'/in/{handle}'.lower())
 
 
 def create_lookup_from_apify_profiles(apify_profiles):
     """
     Index Apify profiles by LinkedIn handle for fast lookup.
 
+    Consumes the profiles in a single pass, so a streaming iterator from
+    get_linkedin_profiles() never has to be materialized as a list first.
+
     Args:
-        apify_profiles: Raw profile list from Apify API
+        apify_profiles: Iterable of raw profile dicts from Apify API
 
     Returns:
         dict: {linkedin_handle: apify_profile_dict}
               e.g., {"/in/artsofbaniya": {...profile_data...}}
     """
-    handle_to_profile = {}
-    for profile in apify_profiles:
-        public_id = profile.get('publicIdentifier', '')
-        if public_id:
-            normalized_handle = normalize_linkedin_handle(public_id)
-            handle_to_profile[normalized_handle] = profile
-    return handle_to_profile
+    # Keep the dict str-keyed: a single non-str key permanently moves CPython
+    # off its faster str-only lookup path for every later probe
+    return {
+        normalize_linkedin_handle(public_id): profile
+        for profile in apify_profiles
+        if (public_id := profile.get('publicIdentifier')) and isinstance(public_id, str)
+    }
 
 
 def match_guest_to_apify_profile(guest_record, apify_profile_lookup):
@@ -61,15 +143,18 @@ def match_guest_to_apify_profile(guest_record, apify_profile_lookup):
     Find Apify profile for a specific guest.
 
     Args:
-        guest_record: Tuple of (luma_guest_api_id, guest_name, linkedin_handle[, retry_count])
+        guest_record: Tuple of
+            (luma_guest_api_id, guest_name, linkedin_handle[, retry_count[, normalized_handle]])
         apify_profile_lookup: Dict from create_lookup_from_apify_profiles()
 
     Returns:
         dict or None: Apify profile if found, None if unavailable
     """
-    # Handle both 3-tuple and 4-tuple formats
-    linkedin_handle = guest_record[2]
-    normalized_handle = normalize_linkedin_handle(linkedin_handle)
+    # Guests fetched from the database arrive with the handle already normalized
+    if len(guest_record) > 4:
+        normalized_handle = guest_record[4]
+    else:
+        normalized_handle = normalize_linkedin_handle(str(guest_record[2]))
     return apify_profile_lookup.get(normalized_handle)
 
 
@@ -89,101 +174,108 @@ def partition_guests_by_profile_availability(pending_guests, apify_profile_looku
     with_profiles = []
     without_profiles = []
 
+    # Bound methods hoisted into locals to skip attribute/global lookups per guest
+    get_profile = apify_profile_lookup.get
+    append_with = with_profiles.append
+    append_without = without_profiles.append
+    normalize = normalize_linkedin_handle
+
+    # A single pass with appends; comprehension/pre-sized variants measured slower.
+    # match_guest_to_apify_profile() is inlined here to save a call per guest
     for guest in pending_guests:
-        apify_profile = match_guest_to_apify_profile(guest, apify_profile_lookup)
+        if len(guest) > 4:
+            normalized_handle = guest[4]
+        else:
+            normalized_handle = normalize(str(guest[2]))
+        apify_profile = get_profile(normalized_handle)
         if apify_profile:
-            with_profiles.append((apify_profile, guest))
+            append_with((apify_profile, guest))
         else:
-            without_profiles.append(guest)
+            append_without(guest)
 
     return with_profiles, without_profiles
 
 
-def build_enriched_profile_record(apify_profile, guest_record):
+def serialize_apify_profile(apify_profile):
+    """
+    Serialize a raw Apify profile for the profile_data JSONB column.
+
+    Args:
+        apify_profile: Raw profile dict from Apify
+
+    Returns:
+        str: Compact JSON text
+    """
+    return orjson.dumps(apify_profile).decode('utf-8')
+
+
+def build_enriched_profile_record(apify_profile, guest_record, profile_json=None):
     """
     Transform Apify profile into database record format.
 
     Args:
         apify_profile: Raw profile dict from Apify
         guest_record: Tuple of (luma_guest_api_id, guest_name, linkedin_handle[, retry_count])
+        profile_json: Pre-serialized profile from serialize_apify_profile(), so a batch
+                      can encode every profile up front; serialized here if omitted
 
     Returns:
-        tuple: Complete database record with all fields populated
+        LinkedInProfileRecord: Complete database record with all fields populated
     """
     # Handle both 3-tuple and 4-tuple formats
     luma_guest_api_id = guest_record[0]
     guest_name = guest_record[1]
     linkedin_handle = guest_record[2]
 
-    return (
+    # Apify normally emits every key (null when unknown); fall back to .get otherwise
+    try:
+        profile_fields = _get_apify_profile_fields(apify_profile)
+    except KeyError:
+        profile_fields = tuple(map(apify_profile.get, _APIFY_PROFILE_FIELDS))
+
+    if profile_json is None:
+        profile_json = serialize_apify_profile(apify_profile)
+
+    return LinkedInProfileRecord(
         luma_guest_api_id,
         linkedin_handle,
         'apify',  # record_source
         True,     # profile_found
         None,     # profile_fetch_message
-        apify_profile.get('fullName'),
-        apify_profile.get('firstName'),
-        apify_profile.get('lastName'),
-        apify_profile.get('headline'),
-        apify_profile.get('about'),
-        apify_profile.get('publicIdentifier'),
-        apify_profile.get('linkedinUrl'),
-        apify_profile.get('connections'),
-        apify_profile.get('followers'),
-        apify_profile.get('jobTitle'),
-        apify_profile.get('companyName'),
-        apify_profile.get('companyIndustry'),
-        apify_profile.get('companyWebsite'),
-        apify_profile.get('companyLinkedin'),
-        apify_profile.get('companyFoundedIn'),
-        apify_profile.get('companySize'),
-        apify_profile.get('currentJobDurationInYrs'),
-        apify_profile.get('addressWithCountry'),
-        apify_profile.get('addressCountryOnly'),
-        apify_profile.get('addressWithoutCountry'),
-        apify_profile.get('profilePic'),
-        apify_profile.get('profilePicHighQuality'),
-        apify_profile.get('topSkillsByEndorsements'),
-        json.dumps(apify_profile),  # profile_data JSONB
+        *profile_fields,
+        profile_json,  # profile_data JSONB
         0,     # retry_count (reset to 0 on success)
         None,  # last_retry_at (clear on success)
         None,  # next_retry_after (clear on success)
     )
 
 
-def build_missing_profile_record(guest_record, current_retry_count=0):
+def build_missing_profile_record(luma_guest_api_id, linkedin_handle, current_retry_count=0):
     """
     Create record for guest with no available LinkedIn profile.
 
     Args:
-        guest_record: Tuple of (luma_guest_api_id, guest_name, linkedin_handle, retry_count)
+        luma_guest_api_id: Guest the record belongs to
+        linkedin_handle: Guest's LinkedIn handle as stored on the guest row
         current_retry_count: Current retry count from database (default 0 for new records)
 
     Returns:
-        tuple: Database record marking profile as not found with retry tracking
+        LinkedInProfileRecord: Database record marking profile as not found with retry tracking
     """
-    # Unpack guest record (may have 3 or 4 fields depending on source)
-    if len(guest_record) == 4:
-        luma_guest_api_id, guest_name, linkedin_handle, db_retry_count = guest_record
-        current_retry_count = db_retry_count or 0
-    else:
-        luma_guest_api_id, guest_name, linkedin_handle = guest_record
-
-    import time
     current_timestamp = int(time.time() * 1000)  # epoch milliseconds
     new_retry_count = current_retry_count + 1
 
     # Exponential backoff: 5min, 20min, 45min (retry_count^2 * 5 minutes)
-    backoff_minutes = (new_retry_count ** 2) * 5
+    backoff_minutes = new_retry_count * new_retry_count * 5
     next_retry_timestamp = current_timestamp + (backoff_minutes * 60 * 1000)
 
-    return (
+    return LinkedInProfileRecord(
         luma_guest_api_id,
         linkedin_handle,
         'apify',  # record_source
         False,    # profile_found
         'Profile not returned by Apify API',  # profile_fetch_message
-        *([None] * 23),  # 23 None values for profile fields (full_name through top_skills_by_endorsements)
+        *_MISSING_PROFILE_FIELDS,  # profile fields (full_name through top_skills_by_endorsements)
         None,  # profile_data JSONB
         new_retry_count,  # retry_count (incremented)
         current_timestamp,  # last_retry_at
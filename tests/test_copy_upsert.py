@@ -0,0 +1,139 @@
+"""
+Test script for the COPY-based upsert path.
+
+This script tests:
+1. COPY text encoding of scalar values (no database needed)
+2. Rejection of values COPY text cannot represent (lists, dicts, bytes)
+3. COPY and execute_values upserts storing identical rows
+
+Before running:
+- Test 3 needs PostgreSQL configured in .env.local (it only uses a temp table)
+
+Usage:
+    python tests/test_copy_upsert.py
+"""
+
+import sys
+import os
+from decimal import Decimal
+
+# Add src to path to import lib modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import lib.db.postgres as postgres
+from lib.db import open_connection, close_connection, execute_query, upsert_multiple_records
+
+
+def test_encode_scalars():
+    """Test COPY text encoding of scalar values"""
+    print("Testing COPY text encoding...")
+
+    cases = [
+        (None, '\\N'),
+        (True, 't'),
+        (False, 'f'),
+        (0, '0'),
+        (Decimal('1.50'), '1.50'),
+        ('plain', 'plain'),
+        ('tab\there', 'tab\\there'),
+        ('line\nbreak\r', 'line\\nbreak\\r'),
+        ('back\\slash', 'back\\\\slash'),
+        ('{"a": "b\\n"}', '{"a": "b\\\\n"}'),
+    ]
+
+    all_passed = True
+    for value, expected in cases:
+        actual = postgres._copy_text_value(value)
+        if actual != expected:
+            print(f"✗ {value!r}: expected {expected!r}, got {actual!r}")
+            all_passed = False
+
+    if all_passed:
+        print(f"✓ {len(cases)} values encoded correctly")
+    return all_passed
+
+
+def test_reject_non_scalars():
+    """Test that values without a COPY text form are rejected"""
+    print("\nTesting rejection of non-scalar values...")
+
+    all_passed = True
+    for value in ([1, 2], (1, 2), {'a': 1}, b'raw'):
+        try:
+            postgres._copy_text_value(value)
+            print(f"✗ {type(value).__name__} value was not rejected")
+            all_passed = False
+        except TypeError:
+            pass
+
+    if all_passed:
+        print("✓ Lists, tuples, dicts and bytes raise TypeError")
+    return all_passed
+
+
+def test_copy_matches_execute_values():
+    """Test that both upsert paths store the same rows"""
+    print("\nTesting COPY vs execute_values upsert...")
+
+    if not open_connection():
+        print("✗ Connection failed")
+        return False
+
+    table = 'pg_temp.copy_upsert_test'
+    columns = ['id', 'label', 'flag', 'amount', 'payload']
+    records = [
+        (1, 'tab\tand\nnewline', True, Decimal('1.5'), '{"a": "b\\\\c"}'),
+        (2, None, False, None, None),
+    ]
+    select_query = f"SELECT id, label, flag, amount, payload FROM {table} ORDER BY id"
+
+    original_threshold = postgres.COPY_UPSERT_THRESHOLD
+    try:
+        execute_query(f"""
+            CREATE TEMP TABLE copy_upsert_test (
+                id INT PRIMARY KEY, label TEXT, flag BOOLEAN, amount NUMERIC, payload JSONB
+            )
+        """, is_insert_or_update_query=True)
+
+        results = []
+        for threshold in (len(records) + 1, 1):
+            postgres.COPY_UPSERT_THRESHOLD = threshold
+            execute_query(f"TRUNCATE {table}", is_insert_or_update_query=True)
+            # Twice, so the second pass goes through ON CONFLICT DO UPDATE
+            for _ in range(2):
+                upsert_multiple_records(records, table, columns, ['id'], columns[1:], jsonb_columns=['payload'])
+            results.append(execute_query(select_query, is_select_query=True))
+
+        if results[0] == results[1] and len(results[0]) == len(records):
+            print(f"✓ Both paths stored identical rows: {results[1]}")
+            return True
+        else:
+            print(f"✗ Rows differ: execute_values={results[0]} COPY={results[1]}")
+            return False
+    except Exception as e:
+        print(f"✗ Upsert failed: {e}")
+        return False
+    finally:
+        postgres.COPY_UPSERT_THRESHOLD = original_threshold
+        close_connection()
+
+
+def main():
+    """Run COPY upsert tests"""
+    print("=" * 50)
+    print("COPY Upsert Test")
+    print("=" * 50)
+
+    tests = [test_encode_scalars, test_reject_non_scalars, test_copy_matches_execute_values]
+    tests_passed = sum(1 for test in tests if test())
+
+    print("\n" + "=" * 50)
+    print(f"Tests passed: {tests_passed}/{len(tests)}")
+    print("=" * 50)
+
+    return tests_passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)